@@ -1,10 +1,28 @@
+"""
+Helper functions shared by the DENA scripts.
+
+Database queries made with `query_tracks` filter flight points by spatially intersecting them with a mask polygon.
+For these queries to stay fast, the flight points geometry column must have a spatial index:
+
+    CREATE INDEX IF NOT EXISTS flight_points_geom_idx ON flight_points USING GIST (geom);
+"""
 import glob
 import logging
 import os
-from typing import List, Optional, TYPE_CHECKING, Union
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple, TYPE_CHECKING, Union
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+from pyproj import CRS, Transformer
+from shapely import ops, wkb
+from shapely.geometry.base import BaseGeometry
+try:
+    from shapely import prepare, transform as transform_coords  # Shapely >= 2.0
+except ImportError:
+    prepare = transform_coords = None
+from sqlalchemy import text
 from tqdm import tqdm
 
 from nps_active_space import ACTIVE_SPACE_DIR
@@ -12,6 +30,7 @@ from nps_active_space.utils import Adsb, EarlyAdsb, Microphone
 
 if TYPE_CHECKING:
     from sqlalchemy.engine import Engine
+    from sqlalchemy.sql.elements import TextClause
 
 
 __all__ = [
@@ -22,6 +41,85 @@ __all__ = [
     'query_tracks'
 ]
 
+# Omni source files for every tuning gain from -30 to +50 in steps of 0.5, in ascending order. E.g. O_-005.src = -.5
+_OMNI_SOURCES = [os.path.join(ACTIVE_SPACE_DIR, 'data', 'tuning', f"O_{i:+04d}.src") for i in range(-300, 505, 5)]
+
+
+@lru_cache(maxsize=16)
+def _transformer(src_crs: CRS, dst_crs: CRS) -> Transformer:
+    """
+    Build a pyproj Transformer between two coordinate systems. Transformers are expensive to create, so they are
+    cached and reused across calls.
+
+    Parameters
+    ----------
+    src_crs : pyproj.CRS
+        The coordinate system to project from.
+    dst_crs : pyproj.CRS
+        The coordinate system to project to.
+
+    Returns
+    -------
+    transformer : pyproj.Transformer
+        A Transformer that takes and returns coordinates in x, y (lon, lat) order.
+    """
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+def _project(geom: BaseGeometry, src_crs: Union[CRS, int, str], dst_crs: Union[CRS, int, str]) -> BaseGeometry:
+    """
+    Project a single shapely geometry from one coordinate system to another using a cached Transformer.
+    With Shapely >= 2.0, all of the geometry's coordinates are passed to the Transformer as one numpy array.
+
+    Parameters
+    ----------
+    geom : shapely geometry
+        The geometry to project.
+    src_crs : pyproj.CRS, int, or str
+        The coordinate system the geometry is currently in, or anything pyproj.CRS accepts. E.g. 4326
+    dst_crs : pyproj.CRS, int, or str
+        The coordinate system to project the geometry to, or anything pyproj.CRS accepts. E.g. 3338
+
+    Returns
+    -------
+    The projected shapely geometry.
+    """
+    src_crs, dst_crs = CRS.from_user_input(src_crs), CRS.from_user_input(dst_crs)
+    if src_crs == dst_crs:
+        return geom
+
+    transformer = _transformer(src_crs, dst_crs)
+    if transform_coords is not None:
+        return transform_coords(geom, lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1])))
+    return ops.transform(transformer.transform, geom)
+
+
+@lru_cache(maxsize=4)
+def _read_metadata(filename: str, mtime: float) -> pd.DataFrame:
+    """
+    Read a microphone deployment metadata file. Files are cached by name and modification time, so a file is only
+    parsed again if it changes.
+
+    Parameters
+    ----------
+    filename : str
+        Absolute path to microphone deployment metadata text file. '/path/to/metadata.txt'
+    mtime : float
+        The file's modification time, as returned by os.path.getmtime.
+
+    Returns
+    -------
+    metadata : pd.DataFrame
+        The deployment metadata indexed by (unit, code, year). Callers should not modify it.
+    """
+    metadata = pd.read_csv(filename, delimiter='\t', encoding='ISO-8859-1')
+
+    # Assure that any sites styled as '009' or '099' are correctly formatted as strings.
+    metadata['code'] = metadata['code'].astype(str).str.zfill(3)
+
+    # A sorted MultiIndex makes each deployment lookup an index search rather than a scan of every row.
+    return metadata.set_index(['unit', 'code', 'year'], drop=False).sort_index()
+
 
 def get_deployment(unit: str, site: str, year: int, filename: str, elevation: bool = True) -> Microphone:
     """
@@ -47,13 +145,9 @@ def get_deployment(unit: str, site: str, year: int, filename: str, elevation: bo
         A Microphone object containing the mic deployment site metadata from the specific unit/site/year combination.
     """
 
-    print(unit, site, year)
-    metadata = pd.read_csv(filename, delimiter='\t', encoding='ISO-8859-1')
-
-    # this rather cumbersome line assures that any sites styled as '009' or '099' are correctly formatted as strings
-    metadata.loc[metadata["code"].astype('str').str.len() <= 3, "code"] = metadata.loc[metadata["code"].astype('str').str.len() <= 3, "code"].apply(lambda s: str(s).zfill(3))
-    
-    site_meta = metadata.loc[(metadata['unit'] == unit) & (metadata['code'] == site) & (metadata['year'] == year)]
+    logger.debug("Deployment: %s %s %s", unit, site, year)
+    metadata = _read_metadata(filename, os.path.getmtime(filename))
+    site_meta = metadata.loc[[(unit, site, year)]]
 
     # Microphone coordinates are stored in WGS84, epsg:4326
     mic = Microphone(
@@ -66,9 +160,57 @@ def get_deployment(unit: str, site: str, year: int, filename: str, elevation: bo
     return mic
 
 
+def _tracks_query(mask_sql: Optional[str] = None) -> 'TextClause':
+    """
+    Build the flight track points query used by query_tracks. Queries are built once at import and reused, so
+    SQLAlchemy can cache their compiled form.
+
+    Parameters
+    ----------
+    mask_sql : str, default None
+        SQL expression for a WGS84 mask polygon to spatially filter flight track points with.
+
+    Returns
+    -------
+    query : sqlalchemy TextClause
+        A query with bound parameters :start_date and :end_date, plus any used by mask_sql.
+    """
+    withs = ""
+    wheres = ["fp.ak_datetime::date BETWEEN :start_date AND :end_date", "NOT ST_IsEmpty(geom)"]
+
+    if mask_sql:
+        # Complex masks, like park boundaries, are split into pieces of at most 256 vertices. The index still
+        #  pre-filters points by bounding box while the exact intersection test only runs against small pieces.
+        withs = f"WITH mask AS (SELECT ST_Subdivide({mask_sql}, 256) AS geom)"
+        wheres.append("EXISTS (SELECT 1 FROM mask WHERE ST_Intersects(fp.geom, mask.geom))")
+
+    return text(f"""
+        {withs}
+        SELECT
+            f.flight_id as flight_id,
+            fp.altitude_ft * 0.3048 as altitude_m,
+            fp.ak_datetime,
+            fp.geom, 
+            date_trunc('hour', fp.ak_datetime) as ak_hourtime
+        FROM flight_points as fp
+        JOIN flights f ON f.id = fp.flight_id
+        WHERE {' AND '.join(wheres)}
+        ORDER BY fp.ak_datetime asc
+        """)
+
+
+_TRACKS_QUERY = _tracks_query()
+_MASK_TRACKS_QUERY = _tracks_query("ST_GeomFromWKB(:mask_wkb, 4326)")
+# Buffer in Alaska Albers, epsg:3338, so the buffer distance is in meters.
+_BUFFERED_MASK_TRACKS_QUERY = _tracks_query(
+    "ST_Transform(ST_Buffer(ST_Transform(ST_GeomFromWKB(:mask_wkb, 4326), 3338), :buffer), 4326)"
+)
+
+
 def query_tracks(engine: 'Engine', start_date: str, end_date: str,
                  mask: Optional[gpd.GeoDataFrame] = None, 
-                 mask_buffer_distance: Optional[int] = None) -> gpd.GeoDataFrame:
+                 mask_buffer_distance: Optional[int] = None,
+                 chunksize: Optional[int] = None) -> Union[gpd.GeoDataFrame, Iterator[gpd.GeoDataFrame]]:
     """
     Query flight tracks from the FlightsDB for a specific date range and optional within a specific area.
 
@@ -82,40 +224,35 @@ def query_tracks(engine: 'Engine', start_date: str, end_date: str,
         ISO date string (YYYY-mm-dd) indicating the end of the date range to query within
     mask : gpd.GeoDataFrame, default None
         Geopandas.GeoDataframe instance to spatially filter query results.
+    mask_buffer_distance : int, default None
+        Distance in meters to buffer the mask by before spatially filtering query results.
+    chunksize : int, default None
+        If provided, results are streamed from the DB with a server-side cursor and returned as an iterator of
+        GeoDataFrames of at most this many flight track points, so the full result is never held in memory.
 
     Returns
     -------
-    data : gpd.GeoDataFrame
-        A GeoDataFrame of flight track points.
+    data : gpd.GeoDataFrame or Iterator of gpd.GeoDataFrames
+        A GeoDataFrame of flight track points, or an iterator of GeoDataFrames if a chunksize was provided.
     """
-    wheres = [f"fp.ak_datetime::date BETWEEN '{start_date}' AND '{end_date}'"]
+    params = {'start_date': start_date, 'end_date': end_date}
 
-    if mask is not None:
-        if mask.crs.to_epsg() != 4326:  # If mask is not already in WGS84, project it.
-            mask = mask.to_crs(epsg='4326')
-        mask['dissolve_field'] = 1
+    if mask is None:
+        query = _TRACKS_QUERY
+    else:
+        # The mask is dissolved and projected to WGS84 client side (and cached) then sent once as WKB. Buffering
+        #  happens in PostGIS, once per query, so the client does not need to project the mask to Alaska Albers.
+        params['mask_wkb'] = _prepare_mask(_MaskRef(mask), None)[1]
         if mask_buffer_distance:
-            ak_albers_mask = mask.to_crs(epsg=3338)
-            mask.geometry = ak_albers_mask.buffer(mask_buffer_distance).to_crs(epsg=4326)
-        mask_wkt = mask.dissolve(by='dissolve_field').squeeze()['geometry'].wkt
-        wheres.append(f"ST_Intersects(geom, ST_GeomFromText('{mask_wkt}', 4326))")
+            query = _BUFFERED_MASK_TRACKS_QUERY
+            params['buffer'] = mask_buffer_distance
+        else:
+            query = _MASK_TRACKS_QUERY
 
-    query = f"""
-        SELECT
-            f.flight_id as flight_id,
-            fp.altitude_ft * 0.3048 as altitude_m,
-            fp.ak_datetime,
-            fp.geom, 
-            date_trunc('hour', fp.ak_datetime) as ak_hourtime
-        FROM flight_points as fp
-        JOIN flights f ON f.id = fp.flight_id
-        WHERE {' AND '.join(wheres)}
-        ORDER BY fp.ak_datetime asc
-        """
-
-    flight_tracks = gpd.GeoDataFrame.from_postgis(query, engine, geom_col='geom', crs='epsg:4326')
+    if chunksize:
+        return _stream_tracks(engine, query, params, chunksize)
 
-    data = flight_tracks.loc[~(flight_tracks.geometry.is_empty)]
+    data = _decode_geometries(pd.read_sql_query(query, engine, params=params))
     return data
 
 
@@ -136,6 +273,10 @@ def query_adsb(adsb_path: str,  start_date: str, end_date: str,
         ISO date string (YYYY-mm-dd) indicating the end of the date range to query within
     mask : gpd.GeoDataFrame, default None
         Geopandas.GeoDataframe instance to spatially filter query results.
+    mask_buffer_distance : int, default None
+        Distance in meters to buffer the mask by before spatially filtering query results.
+    exclude_early_ADSB : bool, default False
+        If True, always read the current ADS-B file format, even for dates in or before 2019.
 
     Returns
     -------
@@ -145,26 +286,116 @@ def query_adsb(adsb_path: str,  start_date: str, end_date: str,
 
     if (int(start_date[:4]) <= 2019) & (exclude_early_ADSB == False):  # ADSB file formats changed after 2019.
         adsb_files = glob.glob(os.path.join(adsb_path, "*.txt"))
-        adsb = EarlyAdsb(adsb_files)
+        adsb = EarlyAdsb(adsb_files, start_time=start_date, end_time=end_date)
     else:
         adsb_files = glob.glob(os.path.join(adsb_path, "*.TSV"))
-        adsb = Adsb(adsb_files)
-    adsb = adsb.loc[(adsb["TIME"] > start_date) & (adsb["TIME"] < end_date)]
+        adsb = Adsb(adsb_files, start_time=start_date, end_time=end_date)
+
+    # Adsb and EarlyAdsb only return points strictly within the date range.
+    adsb = adsb.dropna(subset=['lat', 'lon'])  # Points without coordinates have empty geometries.
 
     if mask is not None:
-        if not mask.crs.to_epsg() == 4326:  # If mask is not already in WGS84, project it.
-            mask = mask.to_crs(epsg='4326')
-        if mask_buffer_distance:
-            ak_albers_mask = mask.to_crs(epsg=3338)
-            mask.geometry = ak_albers_mask.buffer(mask_buffer_distance).to_crs(epsg=4326)
-        print(adsb.crs)
+        mask_geom = _prepare_mask(_MaskRef(mask), mask_buffer_distance)[0]
+        logger.debug("ADS-B crs: %s", adsb.crs)
         adsb.set_crs(epsg='4326', inplace=True)
-        adsb = gpd.clip(adsb, mask)
+        # ADS-B points only need an intersection test, not the geometry clipping done by gpd.clip.
+        adsb = adsb.loc[adsb.geometry.intersects(mask_geom)]
 
-    adsb = adsb.loc[~(adsb.geometry.is_empty)]
     return adsb
 
 
+def _stream_tracks(engine: 'Engine', query: 'TextClause', params: dict, chunksize: int) -> Iterator[gpd.GeoDataFrame]:
+    """
+    Stream flight track points from the overflights DB in chunks using a server-side cursor.
+
+    Parameters
+    ----------
+    engine : sqlalchemy Engine
+        SQLAlchemy Engine instance for connecting to the overflights DB.
+    query : sqlalchemy TextClause
+        The flight track points query to run.
+    params : dict
+        Values for the query's bound parameters.
+    chunksize : int
+        Maximum number of flight track points per chunk.
+
+    Yields
+    ------
+    data : gpd.GeoDataFrame
+        A GeoDataFrame of flight track points.
+    """
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+            yield _decode_geometries(chunk)
+
+
+def _decode_geometries(df: pd.DataFrame, geom_col: str = 'geom') -> gpd.GeoDataFrame:
+    """
+    Convert a DataFrame of flight points read from the overflights DB into a GeoDataFrame. The PostGIS WKB of every
+    point is decoded in one vectorized call instead of one shapely call per row.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Query results with a column of (hex encoded) WKB point geometries in WGS84, epsg:4326.
+    geom_col : str, default 'geom'
+        Name of the WKB geometry column.
+
+    Returns
+    -------
+    A GeoDataFrame with the decoded geometry column set as its geometry.
+    """
+    df[geom_col] = gpd.GeoSeries.from_wkb(df[geom_col], index=df.index, crs='epsg:4326')
+    return gpd.GeoDataFrame(df, geometry=geom_col, crs='epsg:4326')
+
+
+class _MaskRef:
+    """
+    A hashable reference to a mask GeoDataFrame so prepared masks can be cached. Two references are equal if they
+    point to the same mask object with the same number of rows, bounds, and coordinate system.
+    """
+    def __init__(self, mask: gpd.GeoDataFrame):
+        self.mask = mask
+        self.key = (id(mask), len(mask), tuple(mask.total_bounds), mask.crs)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, _MaskRef) and self.key == other.key
+
+
+@lru_cache(maxsize=8)
+def _prepare_mask(mask_ref: _MaskRef, buffer_distance: Optional[int] = None) -> Tuple[BaseGeometry, bytes]:
+    """
+    Dissolve a mask into a single geometry, optionally buffer it, and project it to WGS84, epsg:4326. Prepared masks
+    are cached, so repeated queries with the same mask skip all of this work.
+
+    Parameters
+    ----------
+    mask_ref : _MaskRef
+        Reference to the Geopandas.GeoDataframe instance to prepare.
+    buffer_distance : int, default None
+        Distance in meters to buffer the mask by.
+
+    Returns
+    -------
+    mask_geom : shapely geometry
+        The dissolved (and buffered) mask in WGS84. Prepared when using Shapely >= 2.0.
+    mask_wkb : bytes
+        The WKB of mask_geom.
+    """
+    mask_crs = mask_ref.mask.crs
+    mask_geom = mask_ref.mask.unary_union  # Dissolve first so the mask is projected and buffered as one geometry.
+    if buffer_distance:  # Buffer in Alaska Albers, epsg:3338, so the buffer distance is in meters.
+        mask_geom = _project(_project(mask_geom, mask_crs, 3338).buffer(buffer_distance), 3338, 4326)
+    else:  # If mask is not already in WGS84, project it.
+        mask_geom = _project(mask_geom, mask_crs, 4326)
+    if prepare is not None:  # Prepared geometries make repeated predicates against the mask faster.
+        prepare(mask_geom)
+    return mask_geom, wkb.dumps(mask_geom)
+
+
 class _TqdmStream:
     """
     A Logger Stream so Tqdm loading bars work with python loggers.
@@ -200,6 +431,9 @@ def get_logger(name: str, level: str = 'INFO') -> logging.Logger:
     return logger
 
 
+logger = get_logger(__name__)
+
+
 def get_omni_sources(lower: float, upper: float) -> List[str]:
     """
     Get a list of omni source files for tuning NMSim within a specific gain range.
@@ -229,13 +463,4 @@ def get_omni_sources(lower: float, upper: float) -> List[str]:
     assert upper % .5 == 0, "Invalid upper limit. Value must be divisible by 0.5."
     assert lower % .5 == 0, "Invalid lower limit. Value must be divisible by 0.5."
 
-    omni_source_dir = f"{ACTIVE_SPACE_DIR}\\data\\tuning"
-    omni_sources = []
-
-    for i in range(int(lower*10), int(upper*10+5), 5):
-        if i < 0:
-            omni_sources.append(f"{omni_source_dir}\\O_{i:04}.src")
-        elif i >= 0:
-            omni_sources.append(f"{omni_source_dir}\\O_+{i:03}.src")
-
-    return omni_sources
+    return _OMNI_SOURCES[(int(lower*10) + 300) // 5:(int(upper*10) + 300) // 5 + 1]
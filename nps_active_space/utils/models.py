@@ -4,10 +4,10 @@ import pytz
 import re
 import os
 from dataclasses import dataclass, field
-from typing import List, Optional, Union
+from functools import partial
+from typing import Callable, List, Optional, Union
 
 import geopandas as gpd
-import numpy as np
 import pandas as pd
 pd.options.mode.copy_on_write = True
 from pyproj import Transformer
@@ -423,6 +423,66 @@ class Ais(gpd.GeoDataFrame):
 
         return data
         
+def _in_time_range(times: pd.Series, start_time: Optional[pd.Timestamp] = None,
+                   end_time: Optional[pd.Timestamp] = None) -> pd.Series:
+    """Return a boolean Series of which times fall strictly between the start and end times, if given."""
+    keep = times.notna()
+    if start_time is not None:
+        keep &= times > start_time
+    if end_time is not None:
+        keep &= times < end_time
+    return keep
+
+
+def _read_tsv(file: str, parse_times: Callable[[pd.DataFrame], pd.Series],
+              start_time: Optional[pd.Timestamp] = None, end_time: Optional[pd.Timestamp] = None,
+              **kwargs) -> pd.DataFrame:
+    """
+    Read a tab separated track file and parse when each row was recorded. The parsed times replace the raw time
+    column so they are only parsed once. If a time range is given and no row was recorded strictly between the start
+    and end times, an empty DataFrame is returned so callers can skip cleaning the file. The whole file is still read.
+    Files with rows in the range are returned whole, since splitting points into flights depends on the points before
+    and after the range. Callers filter by time after processing.
+
+    Parameters
+    ----------
+    file : str
+        Absolute path to the tab separated file to read.
+    parse_times : Callable
+        Function that takes the raw file and returns a datetime Series, named after the raw time column, of when
+        each row was recorded. Rows that cannot be parsed should be NaT.
+    start_time : pd.Timestamp, default None
+        The beginning of the time range.
+    end_time : pd.Timestamp, default None
+        The end of the time range.
+    **kwargs
+        Additional keyword arguments passed to pd.read_csv, e.g. dtype.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The rows of the file with parsed times, or an empty DataFrame if none are within the time range.
+    """
+    df = pd.read_csv(file, sep="\t", **kwargs)
+    times = parse_times(df)
+    df[times.name] = times
+
+    if (start_time is not None or end_time is not None) and not _in_time_range(times, start_time, end_time).any():
+        return pd.DataFrame()
+    return df
+
+
+def _adsb_times(df: pd.DataFrame) -> pd.Series:
+    """Parse the Unix timestamps of raw ADS-B rows."""
+    time_col = 'TIME' if 'TIME' in df.columns else 'timestamp'
+    return pd.to_datetime(df[time_col], unit='s')
+
+
+def _early_adsb_times(df: pd.DataFrame) -> pd.Series:
+    """Parse the timestamps of raw early ADS-B rows, truncated to the second."""
+    return pd.to_datetime(df["TIME"], format="%Y/%m/%d %H:%M:%S.%f").dt.floor('s')
+
+
 class Adsb(gpd.GeoDataFrame):
     """
     A geopandas GeoDataFrame wrapper class to ensure consistent ADS-B data.
@@ -431,14 +491,136 @@ class Adsb(gpd.GeoDataFrame):
     ----------
     filepaths_or_data : List, str, or gpd.GeoDataFrame
         A directory containing ADS-B TSV files, a list of ADS-B TSV files, or an existing gpd.GeoDataFrame of ADS-B data.
+    start_time : str or datetime, default None
+        If provided, only ADS-B points recorded after this time (UTC) are returned.
+    end_time : str or datetime, default None
+        If provided, only ADS-B points recorded before this time (UTC) are returned.
     """
 
-    def __init__(self, filepaths_or_data: Union[List[str], str, gpd.GeoDataFrame]):
-        data = self._read(filepaths_or_data)
+    standard_fields = ['ICAO_address', 'TIME', 'lat', 'lon', 'altitude', 'heading', 'hor_velocity', 'ver_velocity', 'flight_id']
+
+    # Declaring column types up front lets pandas skip type inference while parsing. Numeric columns are read as
+    #  floats because missing values, written as '-', are parsed as NaN. Header rows repeated mid-file are also
+    #  parsed as NaN since each of their values is that column's name.
+    field_dtypes = {
+        'TIME': 'float64', 'timestamp': 'float64', 'ICAO_address': str, 'lat': 'float64', 'lon': 'float64',
+        'altitude': 'float64', 'heading': 'float64', 'hor_velocity': 'float64', 'ver_velocity': 'float64',
+        'tslc': 'float64', 'validFlags': str, 'valid_flags': str
+    }
+    na_values = ['-', *field_dtypes]
+
+    def __init__(self, filepaths_or_data: Union[List[str], str, gpd.GeoDataFrame],
+                 start_time: Optional[Union[str, dt.datetime]] = None,
+                 end_time: Optional[Union[str, dt.datetime]] = None):
+        data = self._read(filepaths_or_data, start_time, end_time)
         data.drop_duplicates(subset=['TIME'], inplace=True, keep = 'last')
         super().__init__(data=data)
 
-    def _read(self, filepaths_or_data: Union[List[str], str, gpd.GeoDataFrame]):
+    def parseAdsb(self, file: str, start_time: Optional[pd.Timestamp] = None,
+                  end_time: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Read and clean a single ADS-B TSV file."""
+        df = _read_tsv(file, _adsb_times, start_time, end_time, dtype=self.field_dtypes, na_values=self.na_values)
+        if df.empty:  # No points were recorded within the requested time range.
+            return df
+
+        header_list = ["TIME", "timestamp"]
+        import_header = df.axes[1]
+        result = any(elem in import_header for elem in header_list)
+        if result:
+            pass
+        else:
+            raise KeyError
+
+        # Standardize key field names and remove extra columns collected by the ADS-B df logger
+        if "timestamp" in df.columns:
+            df = df.rename(columns={"timestamp":"TIME"})
+        if "valid_flags" in df.columns:
+            df = df.rename(columns={"valid_flags":"validFlags"})
+        df.drop(["squawk", "altitude_type", "alt_type", "altType", "callsign",
+            "emitter_type", "emitterType"], axis=1, inplace=True, errors="ignore")
+
+        # Delete duplicate and NA records
+        df.drop_duplicates(inplace=True)
+        df.dropna(how="any", axis=0, inplace=True)
+
+        # Unpack validFLags and convert the 2-byte flag field into a list of Boolean values
+        flags_names = ["valid_BARO", "valid_VERTICAL_VELOCITY", "SIMULATED_REPORT", "valid_IDENT",
+                    "valid_CALLSIGN", "valid_VELOCITY", "valid_HEADING", "valid_ALTITUDE", "valid_LATLON"]
+        flags = df["validFlags"].apply(lambda t: list(bin(int(t, 16))[2:].zfill(9)[-9:]))
+        flags_df = pd.DataFrame(list(flags), columns=flags_names, index=df.index).replace({'0': False, '1': True})
+        df = pd.concat([df.drop("validFlags", axis=1), flags_df], axis=1)
+
+        # Keep only those records with valid latlon and altitude values based on validFlags
+        df.dropna(how="any", axis=0, inplace=True)
+        if df["valid_LATLON"].sum() == len(df.index):
+            invalidLatLon = 0
+        else:
+            invalidLatLon = round(100 - df["valid_LATLON"].sum() / len(df.index) * 100, 2)
+        if df["valid_ALTITUDE"].sum() == len(df.index):
+            invalidAltitude = 0
+        else:
+            invalidAltitude = round(100 - df["valid_ALTITUDE"].sum() / len(df.index) * 100, 2)
+        df.drop(df[df["valid_LATLON"] == "False"].index, inplace = True)
+        df.drop(df[df["valid_ALTITUDE"] == "False"].index, inplace = True)
+
+        # Ensure remaining field values except TIME are in proper numeric format
+        df.dropna(how="any", axis=0, inplace=True)
+        df["ICAO_address"] = df["ICAO_address"].astype(str)
+        df["lat"] = df["lat"].astype(int)
+        df["lon"] = df["lon"].astype(int)
+        df["altitude"] = df["altitude"].astype(int)
+        df["heading"] = df["heading"].astype(int)
+        df["hor_velocity"] = df["hor_velocity"].astype(int)
+        df["ver_velocity"] = df["ver_velocity"].astype(int)
+        df["tslc"] = df["tslc"].astype(int)
+
+        # Re-scale selected variable values
+        df["DATE"] = df["TIME"].dt.strftime("%Y%m%d")
+        df["lat"] = df["lat"] / 1e7
+        df["lon"] = df["lon"] / 1e7
+        df["altitude"] = df["altitude"] / 1e3
+        df["heading"] = df["heading"] / 1e2
+        df["hor_velocity"] = df["hor_velocity"] / 1e2
+        df["ver_velocity"] = df["ver_velocity"] / 1e2
+
+        # Keep only those records with TSLC values of 1 or 2 seconds
+        invalidTslc = len(df.query("tslc >= 3 or tslc == 0")) / df.shape[0] * 100
+        df.drop(df[df["tslc"] >= 3].index, inplace = True)
+        df.drop(df[df["tslc"] == 0].index, inplace = True)
+
+        # Keep only those records with realistic altitudes
+        # 10000 meters = 32808 feet; this should encompass most flights
+        # NOTE: some jet aircraft may be eliminated by this process
+        df = df.loc[(df["altitude"] > 0)&(df["altitude"] <= 10000), :] 
+
+        # Sort records by ICAO Address and TIME then reset dfframe index
+        df.sort_values(["ICAO_address", "TIME"], inplace=True, ignore_index=True)
+
+        # Calculate time difference between sequential waypoints for each aircraft
+        df["dur_secs"] = df.groupby("ICAO_address")["TIME"].diff().dt.total_seconds()
+        df["dur_secs"] = df["dur_secs"].fillna(0)
+
+        # Count then delete any identical waypoints in a single input file based on ICAO_address, time, lat, and lon
+        duplicateWaypoints = 100 - (len(df.drop_duplicates(subset=['ICAO_address', 'TIME', 'lat', 'lon'])) / len(df) * 100)
+        df.drop_duplicates(subset=['ICAO_address', 'TIME', 'lat', 'lon'], keep = 'last')
+
+        # Use threshold waypoint duration value to identify separate flights by an aircraft then sum the number of "true" conditions to assign unique ID's
+        df['diff_flight'] = df['dur_secs'] >= 900
+        df['cumsum'] = df.groupby('ICAO_address')['diff_flight'].cumsum()
+        df['flight_id'] = df['ICAO_address'] + "_" + df['cumsum'].astype(str) + "_" + df['DATE']
+
+        # Remove records where there is only one recorded waypoint for an aircraft and fields that are no longer needed
+        df = df[df.groupby("flight_id").flight_id.transform(len) > 1]
+        df = df.drop(columns = ['tslc', 'dur_secs', 'diff_flight', 'cumsum', 'valid_BARO', 'valid_VERTICAL_VELOCITY', 'SIMULATED_REPORT', 'valid_IDENT', 'valid_CALLSIGN', 'valid_VELOCITY', 'valid_HEADING', 'valid_ALTITUDE', 'valid_LATLON', 'DATE'])
+
+        # Only filter by time once flights have been identified so flight ids match those of the whole file.
+        df = df.loc[_in_time_range(df["TIME"], start_time, end_time)]
+
+        return df
+
+    def _read(self, filepaths_or_data: Union[List[str], str, gpd.GeoDataFrame],
+              start_time: Optional[Union[str, dt.datetime]] = None,
+              end_time: Optional[Union[str, dt.datetime]] = None):
         """
         Read in ADS-B points as formatted by NPS data loggers.
 
@@ -446,6 +628,10 @@ class Adsb(gpd.GeoDataFrame):
         ----------
         filepaths_or_data : List, str, or gpd.GeoDataFrame
             A directory containing ADS-B files, a list of ADS-B files, or an existing gpd.GeoDataFrame of ADS-B data.
+        start_time : str or datetime, default None
+            If provided, only rows recorded after this time (UTC) are returned.
+        end_time : str or datetime, default None
+            If provided, only rows recorded before this time (UTC) are returned.
 
         Raises
         ------
@@ -464,105 +650,20 @@ class Adsb(gpd.GeoDataFrame):
                     assert os.path.isfile(file), f"{file} does not exist."
                     assert (file.endswith('.txt')|file.endswith('.TSV')), f"Only .TSV ADS-B files accepted."
 
-            data = pd.DataFrame()
-            for file in tqdm(filepaths_or_data, desc='Loading ADS-B files', unit='files', colour='green'):
-                df = pd.read_csv(file, sep="\t")
-
-                mask = df.iloc[:, 0].isin(["TIME", "timestamp"])
-                df = df[~mask]
-                header_list = ["TIME", "timestamp"]
-                import_header = df.axes[1]
-                result = any(elem in import_header for elem in header_list)
-                if result:
-                    pass
-                else:
-                    raise KeyError
-
-                # Standardize key field names and remove extra columns collected by the ADS-B df logger
-                if "timestamp" in df.columns:
-                    df = df.rename(columns={"timestamp":"TIME"})
-                if "valid_flags" in df.columns:
-                    df = df.rename(columns={"valid_flags":"validFlags"})
-                df.drop(["squawk", "altitude_type", "alt_type", "altType", "callsign",
-                    "emitter_type", "emitterType"], axis=1, inplace=True, errors="ignore")
-
-                # Delete duplicate and NA records
-                df.drop_duplicates(inplace=True)
-                df.dropna(how="any", axis=0, inplace=True)
-
-                # Unpack validFLags and convert the 2-byte flag field into a list of Boolean values
-                flags_names = ["valid_BARO", "valid_VERTICAL_VELOCITY", "SIMULATED_REPORT", "valid_IDENT",
-                            "valid_CALLSIGN", "valid_VELOCITY", "valid_HEADING", "valid_ALTITUDE", "valid_LATLON"]
-                flags = df["validFlags"].apply(lambda t: list(bin(int(t, 16))[2:].zfill(9)[-9:]))
-                flags_df = pd.DataFrame(list(flags), columns=flags_names).replace({'0': False, '1': True})
-                df = pd.concat([df.drop("validFlags", axis=1), flags_df], axis=1)
-
-                # Keep only those records with valid latlon and altitude values based on validFlags
-                df.dropna(how="any", axis=0, inplace=True)
-                if df["valid_LATLON"].sum() == len(df.index):
-                    invalidLatLon = 0
-                else:
-                    invalidLatLon = round(100 - df["valid_LATLON"].sum() / len(df.index) * 100, 2)
-                if df["valid_ALTITUDE"].sum() == len(df.index):
-                    invalidAltitude = 0
-                else:
-                    invalidAltitude = round(100 - df["valid_ALTITUDE"].sum() / len(df.index) * 100, 2)
-                df.drop(df[df["valid_LATLON"] == "False"].index, inplace = True)
-                df.drop(df[df["valid_ALTITUDE"] == "False"].index, inplace = True)
-
-                # Ensure remaining field values except TIME are in proper numeric format
-                df.replace('-', np.NaN, inplace=True)
-                df.dropna(how="any", axis=0, inplace=True)
-                df["ICAO_address"] = df["ICAO_address"].astype(str)
-                df["lat"] = df["lat"].astype(int)
-                df["lon"] = df["lon"].astype(int)
-                df["altitude"] = df["altitude"].astype(int)
-                df["heading"] = df["heading"].astype(int)
-                df["hor_velocity"] = df["hor_velocity"].astype(int)
-                df["ver_velocity"] = df["ver_velocity"].astype(int)
-                df["tslc"] = df["tslc"].astype(int)
-
-                # Convert Unix timestamp to datetime objects in UTC and re-scale selected variable values
-                df["TIME"] = pd.to_datetime(df["TIME"], unit = "s")
-                df["DATE"] = df["TIME"].dt.strftime("%Y%m%d")
-                df["lat"] = df["lat"] / 1e7
-                df["lon"] = df["lon"] / 1e7
-                df["altitude"] = df["altitude"] / 1e3
-                df["heading"] = df["heading"] / 1e2
-                df["hor_velocity"] = df["hor_velocity"] / 1e2
-                df["ver_velocity"] = df["ver_velocity"] / 1e2
-
-                # Keep only those records with TSLC values of 1 or 2 seconds
-                invalidTslc = len(df.query("tslc >= 3 or tslc == 0")) / df.shape[0] * 100
-                df.drop(df[df["tslc"] >= 3].index, inplace = True)
-                df.drop(df[df["tslc"] == 0].index, inplace = True)
-
-                # Keep only those records with realistic altitudes
-                # 10000 meters = 32808 feet; this should encompass most flights
-                # NOTE: some jet aircraft may be eliminated by this process
-                df = df.loc[(df["altitude"] > 0)&(df["altitude"] <= 10000), :] 
-
-                # Sort records by ICAO Address and TIME then reset dfframe index
-                df.sort_values(["ICAO_address", "TIME"], inplace=True, ignore_index=True)
-
-                # Calculate time difference between sequential waypoints for each aircraft
-                df["dur_secs"] = df.groupby("ICAO_address")["TIME"].diff().dt.total_seconds()
-                df["dur_secs"] = df["dur_secs"].fillna(0)
-
-                # Count then delete any identical waypoints in a single input file based on ICAO_address, time, lat, and lon
-                duplicateWaypoints = 100 - (len(df.drop_duplicates(subset=['ICAO_address', 'TIME', 'lat', 'lon'])) / len(df) * 100)
-                df.drop_duplicates(subset=['ICAO_address', 'TIME', 'lat', 'lon'], keep = 'last')
-
-                # Use threshold waypoint duration value to identify separate flights by an aircraft then sum the number of "true" conditions to assign unique ID's
-                df['diff_flight'] = df['dur_secs'] >= 900
-                df['cumsum'] = df.groupby('ICAO_address')['diff_flight'].cumsum()
-                df['flight_id'] = df['ICAO_address'] + "_" + df['cumsum'].astype(str) + "_" + df['DATE']
-
-                # Remove records where there is only one recorded waypoint for an aircraft and fields that are no longer needed
-                df = df[df.groupby("flight_id").flight_id.transform(len) > 1]
-                df = df.drop(columns = ['tslc', 'dur_secs', 'diff_flight', 'cumsum', 'valid_BARO', 'valid_VERTICAL_VELOCITY', 'SIMULATED_REPORT', 'valid_IDENT', 'valid_CALLSIGN', 'valid_VELOCITY', 'valid_HEADING', 'valid_ALTITUDE', 'valid_LATLON', 'DATE'])
-
-                data = pd.concat([data, df], ignore_index=True)
+            start_time = pd.Timestamp(start_time) if start_time is not None else None
+            end_time = pd.Timestamp(end_time) if end_time is not None else None
+
+            with concurrent.futures.ThreadPoolExecutor() as pool:
+                parse = partial(self.parseAdsb, start_time=start_time, end_time=end_time)
+                parts = list(tqdm(pool.map(parse, filepaths_or_data), total=len(filepaths_or_data),
+                                  desc='Loading ADS-B files', unit='files', colour='green'))
+
+            parts = [df for df in parts if not df.empty]
+            data = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=self.standard_fields)
+
+            # Aircraft addresses repeat on every point, so they are dictionary encoded. This is done after concatenating
+            #  since files with different categories would otherwise be concatenated back to objects.
+            data["ICAO_address"] = data["ICAO_address"].astype('category')
 
             data = gpd.GeoDataFrame(
                 data,
@@ -581,14 +682,65 @@ class EarlyAdsb(gpd.GeoDataFrame):
     ----------
     filepaths_or_data : List, str, or gpd.GeoDataFrame
         A directory containing ADS-B TSV files, a list of ADS-B TSV files, or an existing gpd.GeoDataFrame of ADS-B data.
+    start_time : str or datetime, default None
+        If provided, only ADS-B points recorded after this time (UTC) are returned.
+    end_time : str or datetime, default None
+        If provided, only ADS-B points recorded before this time (UTC) are returned.
     """
 
-    def __init__(self, filepaths_or_data: Union[List[str], str, gpd.GeoDataFrame]):
-        data = self._read(filepaths_or_data)
+    standard_fields = ['ICAO_address', 'TIME', 'lat', 'lon', 'altitude', 'DATE', 'dur_secs', 'diff_flight', 'cumsum', 'flight_id']
+    field_dtypes = {'ICAO_address': str, 'TIME': str, 'lat': 'float64', 'lon': 'float64', 'altitude': 'float64'}
+
+    def __init__(self, filepaths_or_data: Union[List[str], str, gpd.GeoDataFrame],
+                 start_time: Optional[Union[str, dt.datetime]] = None,
+                 end_time: Optional[Union[str, dt.datetime]] = None):
+        data = self._read(filepaths_or_data, start_time, end_time)
         data.drop_duplicates(subset=['TIME'], inplace=True, keep='last')
         super().__init__(data=data)
 
-    def _read(self, filepaths_or_data: Union[List[str], str, gpd.GeoDataFrame]):
+    def parseEarlyAdsb(self, file: str, start_time: Optional[pd.Timestamp] = None,
+                       end_time: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Read and clean a single early ADS-B file."""
+        df = _read_tsv(file, _early_adsb_times, start_time, end_time,
+                       header=0, names=["ICAO_address", "TIME", "lat", "lon", "altitude"], dtype=self.field_dtypes)
+        if df.empty:  # No points were recorded within the requested time range.
+            return df
+
+        df["DATE"] = df["TIME"].dt.strftime("%Y%m%d")
+        
+        # unlike later loggers, EarlyAdsb was collected in feet MSL
+        # we need to convert altitude from feet to meters!
+        df["altitude"] = 0.3048*df["altitude"]
+
+        # Keep only those records with realistic altitudes
+        # 10000 meters = 32808 feet; this should encompass most flights
+        # NOTE: some jet aircraft may be eliminated by this process
+        df = df.loc[(df["altitude"] > 0)&(df["altitude"] <= 10000), :] 
+
+        # Sort records by ICAO Address and TIME then reset dataframe index
+        df.sort_values(["ICAO_address", "TIME"], inplace=True, ignore_index=True)
+
+        # Calculate time difference between sequential waypoints for each aircraft
+        df["dur_secs"] = df.groupby("ICAO_address")["TIME"].diff().dt.total_seconds()
+        df["dur_secs"] = df["dur_secs"].fillna(0)
+
+        # Use threshold waypoint duration value to identify separate flights by an aircraft
+        # then sum the number of "true" conditions to assign unique ID's
+        df['diff_flight'] = df['dur_secs'] >= 900
+        df['cumsum'] = df.groupby('ICAO_address')['diff_flight'].cumsum()
+        df['flight_id'] = df['ICAO_address'] + "_" + df['cumsum'].astype(str) + "_" + df['DATE']
+
+        # Remove records where there is only one recorded waypoint for an aircraft
+        df = df[df.groupby("flight_id").flight_id.transform(len) > 1]
+
+        # Only filter by time once flights have been identified so flight ids match those of the whole file.
+        df = df.loc[_in_time_range(df["TIME"], start_time, end_time)]
+
+        return df
+
+    def _read(self, filepaths_or_data: Union[List[str], str, gpd.GeoDataFrame],
+              start_time: Optional[Union[str, dt.datetime]] = None,
+              end_time: Optional[Union[str, dt.datetime]] = None):
         """
         Read in ADS-B points as formatted by early-development NPS data loggers (circa 2019).
 
@@ -596,6 +748,10 @@ class EarlyAdsb(gpd.GeoDataFrame):
         ----------
         filepaths_or_data : List, str, or gpd.GeoDataFrame
             A directory containing ADS-B files, a list of ADS-B files, or an existing gpd.GeoDataFrame of ADS-B data.
+        start_time : str or datetime, default None
+            If provided, only rows recorded after this time (UTC) are returned.
+        end_time : str or datetime, default None
+            If provided, only rows recorded before this time (UTC) are returned.
 
         Raises
         ------
@@ -614,40 +770,20 @@ class EarlyAdsb(gpd.GeoDataFrame):
                     assert os.path.isfile(file), f"{file} does not exist."
                     assert (file.endswith('.txt')), f"Only .txt ADS-B files accepted."
 
-            data = pd.DataFrame()
-            for file in tqdm(filepaths_or_data, desc='Loading ADS-B files', unit='files', colour='green'):
-                df = pd.read_csv(file, sep="\t")
-
-                df.columns = ["ICAO_address", "TIME", "lat", "lon", "altitude"]
-                df["TIME"] = df["TIME"].apply(lambda t: dt.datetime.strptime(t, "%Y/%m/%d %H:%M:%S.%f").replace(microsecond=0))
-                df["DATE"] = df["TIME"].dt.strftime("%Y%m%d")
-                
-                # unlike later loggers, EarlyAdsb was collected in feet MSL
-                # we need to convert altitude from feet to meters!
-                df["altitude"] = 0.3048*df["altitude"]
+            start_time = pd.Timestamp(start_time) if start_time is not None else None
+            end_time = pd.Timestamp(end_time) if end_time is not None else None
 
-                # Keep only those records with realistic altitudes
-                # 10000 meters = 32808 feet; this should encompass most flights
-                # NOTE: some jet aircraft may be eliminated by this process
-                df = df.loc[(df["altitude"] > 0)&(df["altitude"] <= 10000), :] 
-
-                # Sort records by ICAO Address and TIME then reset dataframe index
-                df.sort_values(["ICAO_address", "TIME"], inplace=True, ignore_index=True)
-
-                # Calculate time difference between sequential waypoints for each aircraft
-                df["dur_secs"] = df.groupby("ICAO_address")["TIME"].diff().dt.total_seconds()
-                df["dur_secs"] = df["dur_secs"].fillna(0)
-
-                # Use threshold waypoint duration value to identify separate flights by an aircraft
-                # then sum the number of "true" conditions to assign unique ID's
-                df['diff_flight'] = df['dur_secs'] >= 900
-                df['cumsum'] = df.groupby('ICAO_address')['diff_flight'].cumsum()
-                df['flight_id'] = df['ICAO_address'] + "_" + df['cumsum'].astype(str) + "_" + df['DATE']
+            with concurrent.futures.ThreadPoolExecutor() as pool:
+                parse = partial(self.parseEarlyAdsb, start_time=start_time, end_time=end_time)
+                parts = list(tqdm(pool.map(parse, filepaths_or_data), total=len(filepaths_or_data),
+                                  desc='Loading ADS-B files', unit='files', colour='green'))
 
-                # Remove records where there is only one recorded waypoint for an aircraft
-                df = df[df.groupby("flight_id").flight_id.transform(len) > 1]
+            parts = [df for df in parts if not df.empty]
+            data = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=self.standard_fields)
 
-                data = pd.concat([data, df], ignore_index=True)
+            # Aircraft addresses repeat on every point, so they are dictionary encoded. This is done after concatenating
+            #  since files with different categories would otherwise be concatenated back to objects.
+            data["ICAO_address"] = data["ICAO_address"].astype('category')
 
             data = gpd.GeoDataFrame(
                 data,